@@ -0,0 +1,36 @@
+import sys
+import time
+from typing import Callable
+
+from push_latest_tags import parse_version_block
+
+
+def bench(name: str, comment: str, func: Callable = parse_version_block, repeat: int = 5):
+    """
+    Time func over comment, reporting the best of repeat runs
+    """
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        records, errors = func(comment)
+        best = min(best, time.perf_counter() - start)
+    size_mb = len(comment) / 1024 ** 2
+    print(f"{name:<30} {size_mb:8.2f} MB {best * 1000:10.2f} ms  "
+          f"records={len(records)} errors={len(errors)}")
+
+
+def main():
+    lines = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+
+    block = ''.join(f"step{i} | [1.0.{i}]\t[PATCH|MAJOR|MINOR|x.x.x]\n" for i in range(lines))
+    bench(f"{lines} line block", f"## Modified Steps Check\n$START\n{block}\n$END\n")
+
+    malformed = "step1 | [" * (lines * 4)
+    bench("huge malformed line", f"$START\n{malformed}\n$END\n")
+
+    outside = "step1 | [1.0.0] [MAJOR] not part of the block\n" * lines
+    bench("long text outside markers", f"{outside}$START\nstep1 | [1.0.0] [PATCH]\n$END\n{outside}")
+
+
+if __name__ == "__main__":
+    main()
@@ -7,6 +7,7 @@ from typing import List, Tuple
 from pathlib import Path
 import os
 from docker.errors import BuildError, APIError
+from image_cache import evict_images, get_budget_bytes, record_image_use
 
 
 def run_command(command: List[str]) -> Tuple[str, str, int]:
@@ -137,6 +138,7 @@ def build_and_push(
     # Check if the image already exists locally
     if image_exists_locally(client, full_image_name):
         print(f"Image {full_image_name} already exists. Skipping build.")
+        record_image_use(full_image_name)
         return True  # Image already exists, no need to build and push
 
     try:
@@ -184,6 +186,7 @@ def build_and_push(
         print(e)
         return False  
 
+    record_image_use(full_image_name)
     print("Image built and pushed successfully.")
     return True  
 
@@ -258,6 +261,16 @@ def main():
             print(f"{status}: {step_name}:{version}")
             all_successful = all_successful and success
         
+        # Keep the local image cache within its disk budget, if one is set.
+        # A cleanup failure must not fail a run whose builds succeeded
+        try:
+            budget_bytes = get_budget_bytes()
+            if budget_bytes is not None:
+                keep = {f"{registry}/{step_name}:{version}" for step_name, version, _ in results}
+                evict_images(docker.from_env(), registry, budget_bytes, keep=keep)
+        except Exception as e:
+            print(f"Warning: Image cache eviction failed: {str(e)}")
+
         if not all_successful:
             sys.exit(1)
             
@@ -0,0 +1,254 @@
+import docker
+import fcntl
+import json
+import os
+import sys
+import tempfile
+import time
+import semver
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Set
+from pathlib import Path
+from docker.errors import APIError, ImageNotFound
+
+
+DEFAULT_STATE_FILE = Path.home() / '.cache' / 'step-image-cache.json'
+
+
+def get_state_file() -> Path:
+    """
+    Path of the JSON file recording when each step image was last used.
+    Can be overridden with the IMAGE_CACHE_STATE environment variable.
+    """
+    return Path(os.environ.get('IMAGE_CACHE_STATE', DEFAULT_STATE_FILE))
+
+
+def get_budget_bytes() -> Optional[int]:
+    """
+    Disk budget for cached step images, read from IMAGE_CACHE_BUDGET_GB.
+    The budget bounds the sum of each step image's unique size (see
+    evict_images), not the total disk used by Docker.
+    Returns None if no budget is configured (eviction disabled).
+    Raises ValueError if the budget is not a non-negative number.
+    """
+    budget = os.environ.get('IMAGE_CACHE_BUDGET_GB')
+    if not budget:
+        return None
+    try:
+        budget_gb = float(budget)
+    except ValueError:
+        budget_gb = -1
+    if not budget_gb >= 0 or budget_gb == float('inf'):
+        raise ValueError(f"IMAGE_CACHE_BUDGET_GB must be a number of gigabytes, e.g. '20', got {budget!r}")
+    return int(budget_gb * 1024 ** 3)
+
+
+@contextmanager
+def locked_state(state_file: Path) -> Iterator[None]:
+    """
+    Hold an exclusive lock on the state file for a read-modify-write, so jobs
+    sharing it on the same host do not overwrite each other's updates.
+    """
+    state_file.parent.mkdir(parents=True, exist_ok=True)
+    with open(state_file.with_name(state_file.name + '.lock'), 'w') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def load_usage(state_file: Path) -> Dict[str, float]:
+    """
+    Load the {image_name: last_used_timestamp} map, or an empty map if the
+    state file is missing or unreadable.
+    """
+    try:
+        with open(state_file) as f:
+            usage = json.load(f)
+    except FileNotFoundError:
+        return {}
+    except (json.JSONDecodeError, OSError) as e:
+        print(f"Warning: Ignoring unreadable image cache state {state_file}: {e}")
+        return {}
+    return usage if isinstance(usage, dict) else {}
+
+
+def save_usage(state_file: Path, usage: Dict[str, float]):
+    """
+    Write the usage map, replacing the previous file atomically.
+    Callers should hold locked_state(state_file).
+    """
+    state_file.parent.mkdir(parents=True, exist_ok=True)
+    with tempfile.NamedTemporaryFile('w', dir=state_file.parent, delete=False) as f:
+        json.dump(usage, f, indent=2, sort_keys=True)
+    try:
+        os.replace(f.name, state_file)
+    except OSError:
+        os.unlink(f.name)
+        raise
+
+
+def record_image_use(full_image_name: str, state_file: Optional[Path] = None):
+    """
+    Mark registry/step:version as used now (a cache hit or a fresh build).
+    """
+    state_file = state_file or get_state_file()
+    try:
+        with locked_state(state_file):
+            usage = load_usage(state_file)
+            usage[full_image_name] = time.time()
+            save_usage(state_file, usage)
+    except OSError as e:
+        print(f"Warning: Failed to record use of {full_image_name}: {e}")
+
+
+def parse_step_tag(tag: str, registry: str):
+    """
+    Split 'registry/step:version' into (step, parsed_version).
+    Returns None for tags that are not versioned step images of this registry.
+    """
+    prefix = f"{registry}/"
+    if not tag.startswith(prefix):
+        return None
+    name, sep, version = tag[len(prefix):].rpartition(':')
+    if not sep or not name or '/' in name:
+        return None
+    try:
+        return name, semver.VersionInfo.parse(version)
+    except ValueError:
+        return None
+
+
+def evict_images(
+    client,
+    registry: str,
+    budget_bytes: int,
+    keep: Optional[Set[str]] = None,
+    state_file: Optional[Path] = None
+) -> List[str]:
+    """
+    Remove least-recently-used step images until the space they hold on their
+    own fits within budget_bytes.
+
+    Usage is measured per image as Size - SharedSize from docker df, i.e. only
+    layers no other image references. Layers shared between several old
+    versions of a step (e.g. a pip layer reused by step1:1.0.0..1.0.9 but not
+    the latest) are counted for none of them, so the measured total can sit
+    below the real disk usage until those versions are gone.
+
+    The latest local version of each step and any image name in keep are never
+    removed. Only image tags are removed, so layers still referenced by another
+    image (e.g. a shared python base) stay on disk. Images sharing an ID with a
+    protected tag or with any tag that is not a versioned step tag of this
+    registry are skipped, as removing the step tag would free nothing.
+
+    Returns:
+        List of removed image names
+    """
+    keep = keep or set()
+    state_file = state_file or get_state_file()
+    with locked_state(state_file):
+        usage = load_usage(state_file)
+
+    # Size of each image excluding layers shared with other images, which is
+    # what removing the image can actually reclaim. tags_by_id holds every tag,
+    # not just step tags, as an image only leaves the disk once all are gone
+    images = {}
+    tags_by_id = {}
+    for image in client.df().get('Images') or []:
+        size = image.get('Size', 0)
+        shared = image.get('SharedSize', -1)
+        unique_size = size - shared if shared >= 0 else size
+        tags_by_id[image['Id']] = set(image.get('RepoTags') or [])
+        for tag in tags_by_id[image['Id']]:
+            parsed = parse_step_tag(tag, registry)
+            if parsed:
+                images[tag] = (image['Id'], unique_size, image.get('Created', 0), *parsed)
+
+    latest = {}
+    for tag, (_, _, _, step, version) in images.items():
+        if step not in latest or version > images[latest[step]][4]:
+            latest[step] = tag
+
+    protected = keep | set(latest.values())
+    protected_ids = {images[tag][0] for tag in protected if tag in images}
+    protected_ids |= {
+        image_id for image_id, tags in tags_by_id.items()
+        if any(not parse_step_tag(tag, registry) for tag in tags)
+    }
+
+    # Count each image ID once, however many step tags point at it
+    sizes_by_id = {image_id: size for image_id, size, *_ in images.values()}
+    total = sum(sizes_by_id.values())
+    print(f"Step images use {total / 1024 ** 3:.2f} GB of a {budget_bytes / 1024 ** 3:.2f} GB budget")
+
+    # Images never recorded in the state file fall back to their creation time
+    candidates = sorted(
+        (tag for tag, (image_id, *_) in images.items() if image_id not in protected_ids),
+        key=lambda tag: usage.get(tag, images[tag][2])
+    )
+
+    removed = []
+    for tag in candidates:
+        if total <= budget_bytes:
+            break
+        image_id = images[tag][0]
+        try:
+            client.images.remove(tag)
+        except ImageNotFound:
+            pass
+        except APIError as e:
+            # Typically the image is in use by a container
+            print(f"Warning: Could not evict {tag}: {e}")
+            continue
+        print(f"Evicted {tag}")
+        removed.append(tag)
+        tags_by_id[image_id].discard(tag)
+        if not tags_by_id[image_id]:
+            total -= sizes_by_id[image_id]
+
+    # Forget evicted images, and this registry's images that were already gone
+    # before eviction started. Reload first, and keep any stale entry whose
+    # timestamp changed, so uses recorded by other jobs meanwhile are kept
+    stale = {
+        tag: ts for tag, ts in usage.items()
+        if tag not in images and parse_step_tag(tag, registry)
+    }
+    try:
+        with locked_state(state_file):
+            usage = load_usage(state_file)
+            usage = {
+                tag: ts for tag, ts in usage.items()
+                if tag not in removed and stale.get(tag) != ts
+            }
+            save_usage(state_file, usage)
+    except OSError as e:
+        print(f"Warning: Failed to update image cache state: {e}")
+
+    if total > budget_bytes:
+        print(f"Warning: Step images still use {total / 1024 ** 3:.2f} GB after eviction")
+    return removed
+
+
+def main():
+    registry = os.environ.get('REGISTRY')
+    try:
+        budget_bytes = get_budget_bytes()
+    except ValueError as e:
+        print(str(e))
+        sys.exit(1)
+
+    if not registry or budget_bytes is None:
+        print("Missing required environment variables REGISTRY and IMAGE_CACHE_BUDGET_GB")
+        sys.exit(1)
+
+    try:
+        evict_images(docker.from_env(), registry, budget_bytes)
+    except Exception as e:
+        print(f"Image cache eviction failed: {str(e)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -7,25 +7,113 @@ from typing import List, Tuple
 import semver
 
 
-def extract_versions(comment):
-    # Regex to match the format: step1 | [1.0.0] [PATCH|MAJOR|MINOR|x.x.x]
-    if comment == '_No matching tags found_':
-        return "nothing to bump"
-    pattern = r'(.+?) \|\s*\[(.+?)\]\s*\[(.+?)\]'
-    matches = re.findall(pattern, comment)
-
-    # Validate the bump type (must be MAJOR, MINOR, PATCH, or a version number)
-    valid_bump_types = {'MAJOR', 'MINOR', 'PATCH'}
-
-    parsed_results = []
-    for step, current_version, bump_type in matches:
-        # If the bump type is not valid, default it to PATCH
-        if bump_type not in valid_bump_types and not re.match(r'^\d+\.\d+\.\d+$', bump_type):
-            bump_type = 'PATCH'
-            
-        parsed_results.append((step.strip(), current_version.strip(), bump_type.strip()))
-    
-    return parsed_results
+VERSION_PATTERN = re.compile(r'\d+\.\d+\.\d+')
+VALID_BUMP_TYPES = {'MAJOR', 'MINOR', 'PATCH'}
+START_MARKER = '$START'
+END_MARKER = '$END'
+NO_TAGS_LINE = '_No matching tags found_'
+BUMP_PLACEHOLDER = 'PATCH|MAJOR|MINOR|x.x.x'
+MAX_ECHOED_LINE = 80
+
+
+def _read_bracket(text: str, pos: int, field: str) -> Tuple[str, int]:
+    """
+    Read a single '[value]' group starting at pos (leading whitespace allowed).
+    Returns the stripped value and the position just past the closing bracket.
+    Raises ValueError naming the field if the group is missing or unterminated.
+    """
+    while pos < len(text) and text[pos].isspace():
+        pos += 1
+    if pos >= len(text) or text[pos] != '[':
+        raise ValueError(f"missing {field} '[...]'")
+    close = text.find(']', pos + 1)
+    if close == -1:
+        raise ValueError(f"missing ']' after {field}")
+    return text[pos + 1:close].strip(), close + 1
+
+
+def parse_version_line(line: str) -> Tuple[str, str, str]:
+    """
+    Parse one line of the form: step1 | [1.0.0] [PATCH|MAJOR|MINOR|x.x.x]
+    The unedited bump placeholder defaults to PATCH.
+    Raises ValueError describing the problem if the line is malformed.
+    """
+    step, sep, rest = line.partition('|')
+    step = step.strip()
+    if not sep:
+        raise ValueError("missing '|' separator")
+    if not step:
+        raise ValueError("missing step name")
+
+    current_version, pos = _read_bracket(rest, 0, 'current version')
+    bump_type, pos = _read_bracket(rest, pos, 'bump type')
+    if rest[pos:].strip():
+        raise ValueError("unexpected text after bump type")
+    if not VERSION_PATTERN.fullmatch(current_version):
+        raise ValueError(f"invalid current version {current_version!r}, expected x.x.x")
+
+    if bump_type == BUMP_PLACEHOLDER:
+        bump_type = 'PATCH'
+    elif bump_type not in VALID_BUMP_TYPES and not VERSION_PATTERN.fullmatch(bump_type):
+        raise ValueError(f"invalid bump type {bump_type!r}, expected PATCH, MAJOR, MINOR or x.x.x")
+
+    return step, current_version, bump_type
+
+
+def parse_version_block(comment: str) -> Tuple[List[Tuple[str, str, str]], List[Tuple[int, str]]]:
+    """
+    Parse the $START/$END delimited block of the version-bump comment in a
+    single pass over its lines. Text outside the markers is never scanned.
+
+    Returns:
+        (records, errors) where records is a list of (step, current_version, bump_type)
+        and errors is a list of (line_number, message), line numbers counted
+        from the start of the comment.
+    """
+    start = comment.find(START_MARKER)
+    if start == -1:
+        return [], [(0, f"missing {START_MARKER} marker")]
+
+    errors = []
+    block_start = start + len(START_MARKER)
+    end = comment.find(END_MARKER, block_start)
+    if end == -1:
+        errors.append((0, f"missing {END_MARKER} marker"))
+        end = len(comment)
+
+    first_line = comment.count('\n', 0, block_start) + 1
+    records = []
+    first_seen = {}
+    for offset, line in enumerate(comment[block_start:end].split('\n')):
+        line = line.strip()
+        if not line or line == NO_TAGS_LINE:
+            continue
+        try:
+            record = parse_version_line(line)
+            if record[0] in first_seen:
+                raise ValueError(f"duplicate step {record[0]!r}, first listed on line {first_seen[record[0]]}")
+            first_seen[record[0]] = first_line + offset
+            records.append(record)
+        except ValueError as e:
+            if len(line) > MAX_ECHOED_LINE:
+                line = line[:MAX_ECHOED_LINE] + '...'
+            errors.append((first_line + offset, f"{e}: {line!r}"))
+
+    return records, errors
+
+
+def extract_versions(comment: str) -> List[Tuple[str, str, str]]:
+    """
+    Extract (step, current_version, bump_type) records from the PR comment.
+    Malformed lines are reported on stderr and a ValueError is raised, so a
+    typo never leaves a step silently untagged.
+    """
+    records, errors = parse_version_block(comment)
+    for line_number, message in errors:
+        print(f"Line {line_number}: {message}", file=sys.stderr)
+    if errors:
+        raise ValueError(f"{len(errors)} malformed line(s) in the version comment")
+    return records
 
 def run_command(command: List[str]) -> Tuple[str, str, int]:
     """
@@ -53,7 +141,7 @@ def increment_version(current_version: str, change_type: str) -> str:
         return str(version.bump_minor())
     elif change_type == 'PATCH':
         return str(version.bump_patch())
-    elif re.match(r'^\d+\.\d+\.\d+$', bump_type):
+    elif VERSION_PATTERN.fullmatch(change_type.strip()):
         return change_type.strip()
     else:
         raise ValueError(f"Invalid change type: {change_type}")
@@ -144,17 +232,20 @@ if __name__ == "__main__":
         print("No comment found in environment variable 'LATEST_COMMENT'", file=sys.stderr)
         sys.exit(1)
 
-    # Configure git
-    configure_git()
-    
     if current_tag_map == 'NA':
-        versions = extract_versions(comments)
+        try:
+            versions = extract_versions(comments)
+        except ValueError as e:
+            print(f"Failed to parse version comment: {e}", file=sys.stderr)
+            sys.exit(1)
     else:
         versions = json.loads(current_tag_map)
-    
-    for v in versions:
-        v.append('PATCH')
-    
+        for v in versions:
+            v.append('PATCH')
+
+    # Configure git
+    configure_git()
+
     print(versions)
     tag_map = []
 
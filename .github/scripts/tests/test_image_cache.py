@@ -0,0 +1,196 @@
+import json
+
+import pytest
+from docker.errors import APIError
+
+import image_cache
+from image_cache import evict_images, get_budget_bytes, record_image_use
+
+GB = 1024 ** 3
+
+
+class FakeImages:
+    def __init__(self, fail=()):
+        self.removed = []
+        self.fail = set(fail)
+
+    def remove(self, tag):
+        if tag in self.fail:
+            raise APIError(f"conflict: {tag} is in use")
+        self.removed.append(tag)
+
+
+class FakeClient:
+    """
+    Minimal stand-in for docker.DockerClient: df() and images.remove only
+    """
+    def __init__(self, images, fail=()):
+        self._images = images
+        self.images = FakeImages(fail)
+
+    def df(self):
+        return {'Images': self._images}
+
+
+def image(image_id, tags, size_gb, shared_gb=0, created=0):
+    return {
+        'Id': image_id,
+        'RepoTags': tags,
+        'Size': size_gb * GB,
+        'SharedSize': shared_gb * GB,
+        'Created': created,
+    }
+
+
+@pytest.fixture
+def state_file(tmp_path):
+    return tmp_path / 'state.json'
+
+
+def write_state(state_file, usage):
+    state_file.write_text(json.dumps(usage))
+
+
+def read_state(state_file):
+    return json.loads(state_file.read_text())
+
+
+def test_evicts_least_recently_used_first(state_file):
+    client = FakeClient([
+        image('a', ['r/step1:1.0.0'], 2),
+        image('b', ['r/step1:1.0.1'], 2),
+        image('c', ['r/step1:1.1.0'], 2),
+    ])
+    write_state(state_file, {'r/step1:1.0.0': 200, 'r/step1:1.0.1': 100})
+
+    assert evict_images(client, 'r', 4 * GB, state_file=state_file) == ['r/step1:1.0.1']
+
+
+def test_falls_back_to_creation_time(state_file):
+    client = FakeClient([
+        image('a', ['r/step1:1.0.0'], 2, created=300),
+        image('b', ['r/step1:1.0.1'], 2, created=50),
+        image('c', ['r/step1:1.1.0'], 2, created=10),
+    ])
+    write_state(state_file, {'r/step1:1.0.0': 100})
+
+    assert evict_images(client, 'r', 4 * GB, state_file=state_file) == ['r/step1:1.0.1']
+
+
+def test_keeps_latest_version_and_current_run(state_file):
+    client = FakeClient([
+        image('a', ['r/step1:1.0.0'], 2),
+        image('b', ['r/step1:2.0.0'], 2),
+        image('c', ['r/step2:1.0.0'], 2),
+        image('d', ['r/step2:1.1.0'], 2),
+    ])
+
+    removed = evict_images(client, 'r', 0, keep={'r/step2:1.0.0'}, state_file=state_file)
+
+    assert removed == ['r/step1:1.0.0']
+
+
+def test_skips_images_sharing_id_with_protected_tag(state_file):
+    client = FakeClient([
+        image('a', ['r/step1:1.0.0', 'r/step1:1.1.0'], 2),
+        image('b', ['r/step1:0.9.0'], 2),
+    ])
+
+    assert evict_images(client, 'r', 0, state_file=state_file) == ['r/step1:0.9.0']
+
+
+def test_ignores_other_registries_and_shared_layers(state_file):
+    client = FakeClient([
+        image('base', ['python:3.9-slim'], 1, shared_gb=1),
+        image('a', ['r/step1:1.0.0'], 3, shared_gb=1),
+        image('b', ['r/step1:1.1.0'], 3, shared_gb=1),
+    ])
+
+    # Only the 2 GB unique to each step image counts against the budget
+    assert evict_images(client, 'r', 4 * GB, state_file=state_file) == []
+    assert evict_images(client, 'r', 3 * GB, state_file=state_file) == ['r/step1:1.0.0']
+
+
+@pytest.mark.parametrize("other_tag", ['other/x:1', 'r/step2:latest'])
+def test_skips_images_with_other_tags(state_file, other_tag):
+    client = FakeClient([
+        image('a', ['r/step2:0.9.0', other_tag], 2),
+        image('b', ['r/step2:1.0.0'], 2, created=10),
+        image('c', ['r/step2:1.1.0'], 2),
+    ])
+
+    # Untagging r/step2:0.9.0 would leave image 'a' on disk under its other tag
+    removed = evict_images(client, 'r', 4 * GB, state_file=state_file)
+
+    assert removed == ['r/step2:1.0.0']
+
+
+def test_continues_past_images_that_cannot_be_removed(state_file):
+    client = FakeClient([
+        image('a', ['r/step1:1.0.0'], 2, created=1),
+        image('b', ['r/step1:1.0.1'], 2, created=2),
+        image('c', ['r/step1:1.1.0'], 2, created=3),
+    ], fail={'r/step1:1.0.0'})
+
+    assert evict_images(client, 'r', 4 * GB, state_file=state_file) == ['r/step1:1.0.1']
+
+
+def test_prunes_stale_state(state_file):
+    client = FakeClient([
+        image('a', ['r/step1:1.0.0'], 2),
+        image('b', ['r/step1:1.1.0'], 2),
+    ])
+    write_state(state_file, {
+        'r/step1:1.0.0': 100,
+        'r/step1:1.1.0': 200,
+        'r/step1:0.1.0': 50,
+        'other/x:1.0.0': 10,
+    })
+
+    evict_images(client, 'r', 2 * GB, state_file=state_file)
+
+    assert read_state(state_file) == {'r/step1:1.1.0': 200, 'other/x:1.0.0': 10}
+
+
+def test_keeps_uses_recorded_during_eviction(state_file):
+    client = FakeClient([
+        image('a', ['r/step1:1.0.0'], 2),
+        image('b', ['r/step1:1.1.0'], 2),
+    ])
+    write_state(state_file, {'r/step1:1.0.0': 100, 'r/step1:0.1.0': 50, 'r/step1:0.2.0': 60})
+
+    def remove(tag):
+        # Another job builds new images and rebuilds a stale one meanwhile
+        usage = read_state(state_file)
+        usage.update({'r/step3:1.0.0': 300, 'r/step1:0.2.0': 400})
+        write_state(state_file, usage)
+    client.images.remove = remove
+
+    assert evict_images(client, 'r', 2 * GB, state_file=state_file) == ['r/step1:1.0.0']
+    assert read_state(state_file) == {'r/step3:1.0.0': 300, 'r/step1:0.2.0': 400}
+
+
+def test_record_image_use(state_file, monkeypatch):
+    monkeypatch.setattr(image_cache.time, 'time', lambda: 123.0)
+    write_state(state_file, {'r/step1:1.0.0': 1})
+
+    record_image_use('r/step2:1.0.0', state_file=state_file)
+
+    assert read_state(state_file) == {'r/step1:1.0.0': 1, 'r/step2:1.0.0': 123.0}
+    assert [p.name for p in state_file.parent.iterdir() if p.name != 'state.json.lock'] == ['state.json']
+
+
+@pytest.mark.parametrize("value, expected", [(None, None), ('', None), ('2', 2 * GB), ('0.5', GB // 2)])
+def test_budget(monkeypatch, value, expected):
+    if value is None:
+        monkeypatch.delenv('IMAGE_CACHE_BUDGET_GB', raising=False)
+    else:
+        monkeypatch.setenv('IMAGE_CACHE_BUDGET_GB', value)
+    assert get_budget_bytes() == expected
+
+
+@pytest.mark.parametrize("value", ['10GB', '-1', 'nan', 'inf'])
+def test_invalid_budget(monkeypatch, value):
+    monkeypatch.setenv('IMAGE_CACHE_BUDGET_GB', value)
+    with pytest.raises(ValueError, match='IMAGE_CACHE_BUDGET_GB'):
+        get_budget_bytes()
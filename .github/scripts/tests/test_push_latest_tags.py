@@ -0,0 +1,107 @@
+import pytest
+
+from push_latest_tags import extract_versions, increment_version, parse_version_block, parse_version_line
+
+
+def test_unedited_template_defaults_to_patch():
+    assert parse_version_line("step1 | [1.0.0]\t[PATCH|MAJOR|MINOR|x.x.x]") == ('step1', '1.0.0', 'PATCH')
+
+
+def test_explicit_bump_types():
+    assert parse_version_line("step1 | [1.0.0] [MINOR]") == ('step1', '1.0.0', 'MINOR')
+    assert parse_version_line("step1|[1.0.0][2.3.4]") == ('step1', '1.0.0', '2.3.4')
+
+
+@pytest.mark.parametrize("line, message", [
+    ("step1 [1.0.0] [PATCH]", "missing '|' separator"),
+    ("| [1.0.0] [PATCH]", "missing step name"),
+    ("step5|[1.0.0]", "missing bump type '[...]'"),
+    ("step5 | [1.0.0", "missing ']' after current version"),
+    ("step5 | [1.0.0] [PATCH] extra", "unexpected text after bump type"),
+    ("step1 | [] [PATCH]", "invalid current version"),
+    ("step1 | [not-a-version] [MAJOR]", "invalid current version"),
+    ("step1 | [1.0] [MAJOR]", "invalid current version"),
+    ("step1 | [1.0.0] []", "invalid bump type"),
+    ("step1 | [1.0.0] [MAJRO]", "invalid bump type"),
+    ("step1 | [1.0.0] [major]", "invalid bump type"),
+    ("step1 | [1.0.0] [2.0]", "invalid bump type"),
+    ("step1 | [1.0.0] [PATCH|MINOR]", "invalid bump type"),
+])
+def test_malformed_lines(line, message):
+    with pytest.raises(ValueError, match=message.replace('[', r'\[').replace('|', r'\|')):
+        parse_version_line(line)
+
+
+def test_block_only_reads_between_markers():
+    comment = (
+        "## Modified Steps Check\n"
+        "step0 | [1.0.0] [MAJOR]\n"
+        "$START\n"
+        "step1 | [1.0.0]\t[PATCH|MAJOR|MINOR|x.x.x]\n"
+        "step2 | [2.1.0] [3.0.0]\n"
+        "\n"
+        "$END\n"
+        "step9 | [1.0.0] [MAJOR]\n"
+    )
+    assert parse_version_block(comment) == ([('step1', '1.0.0', 'PATCH'), ('step2', '2.1.0', '3.0.0')], [])
+
+
+def test_crlf_line_endings():
+    comment = "intro\r\n$START\r\nstep1 | [1.0.0] [MINOR]\r\n\r\n$END\r\n"
+    assert parse_version_block(comment) == ([('step1', '1.0.0', 'MINOR')], [])
+
+
+def test_no_matching_tags_line_is_not_an_error():
+    assert parse_version_block("$START\n_No matching tags found_\n\n$END\n") == ([], [])
+
+
+def test_missing_markers():
+    assert parse_version_block("step1 | [1.0.0] [PATCH]") == ([], [(0, "missing $START marker")])
+    records, errors = parse_version_block("$START\nstep1 | [1.0.0] [PATCH]\n")
+    assert records == [('step1', '1.0.0', 'PATCH')]
+    assert errors == [(0, "missing $END marker")]
+
+
+def test_error_line_numbers():
+    comment = "## Title\n\n$START\nstep1 | [1.0.0] [PATCH]\nbad line\nstep3|[1.0.0]\n$END\n"
+    records, errors = parse_version_block(comment)
+    assert records == [('step1', '1.0.0', 'PATCH')]
+    assert [line_number for line_number, _ in errors] == [5, 6]
+    assert "missing bump type" in errors[1][1]
+
+
+def test_long_lines_are_truncated_in_errors():
+    _, errors = parse_version_block("$START\n" + "x | [" * 20000 + "\n$END")
+    assert len(errors) == 1
+    assert len(errors[0][1]) < 200
+
+
+def test_extract_versions_fails_on_errors():
+    with pytest.raises(ValueError):
+        extract_versions("$START\nstep1 | [1.0.0] [PATCH]\nbad line\n$END")
+    with pytest.raises(ValueError):
+        extract_versions("no markers here")
+
+
+def test_duplicate_step_is_an_error():
+    comment = "$START\nstep1 | [1.0.0] [PATCH]\nstep2 | [1.0.0] [PATCH]\nstep1 | [1.0.0] [MAJOR]\n$END"
+    records, errors = parse_version_block(comment)
+    assert records == [('step1', '1.0.0', 'PATCH'), ('step2', '1.0.0', 'PATCH')]
+    assert len(errors) == 1
+    assert errors[0][0] == 4
+    assert "duplicate step 'step1', first listed on line 2" in errors[0][1]
+
+
+@pytest.mark.parametrize("change_type, expected", [
+    ('PATCH', '1.2.4'),
+    ('MINOR', '1.3.0'),
+    ('MAJOR', '2.0.0'),
+    ('2.3.4', '2.3.4'),
+])
+def test_increment_version(change_type, expected):
+    assert increment_version('1.2.3', change_type) == expected
+
+
+def test_increment_version_invalid_change_type():
+    with pytest.raises(ValueError, match="Invalid change type"):
+        increment_version('1.0.0', 'MAJRO')